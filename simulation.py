@@ -1,143 +1,287 @@
 import streamlit as st
-import pandas as pd
-import random
 
-# ---------------------------
-# Simulation Function
-# ---------------------------
-def simulate_dual_currency_economy(num_people, num_businesses, num_landlords, num_steps):
-    people = []
-    businesses = []
-    landlords = []
-    universal_total = 0
-    dollar_total = 0
-
-    for _ in range(num_people):
-        income = random.randint(20000, 50000)
-        rent = random.randint(800, 2000)
-        capital = income * random.uniform(0.0, 0.1)
-        target_capital = income * 0.25
-        gap = max(0, target_capital - capital)
-        universals_issued = gap * 0.5
-
-        # Determine price structure of a typical basket
-        basket_price = 1000
-        capture_ratio = 0.3  # 30% of basket contributes to capital at vendor side
-        captured_value = basket_price * capture_ratio
-        real_payment = basket_price - (captured_value * 0.5)
-        universal_payment = captured_value * 0.5
-
-        # Create more universals for lowest incomes
-        income_boost = max(0, 30000 - income)
-        extra_universals = income_boost * 0.05
-        universals_issued += extra_universals
-
-        spending = income * random.uniform(0.5, 0.85)
-        universal_spending = spending * random.uniform(0.4, 0.9) * 0.2
-        dollar_spending = spending - universal_spending
-
-        wealth_before = capital
-        wealth_after = capital + universals_issued
-
-        people.append({
-            "Income": income,
-            "Rent": rent,
-            "Capital": capital,
-            "Universals": universals_issued,
-            "Dollar_Spending": dollar_spending,
-            "Universal_Spending": universal_spending,
-            "Wealth_Before": wealth_before,
-            "Wealth_After": wealth_after,
-            "Net_Gain": universals_issued,
-            "Real_Payment": real_payment,
-            "Universal_Payment": universal_payment
-        })
-
-        universal_total += universal_spending
-        dollar_total += dollar_spending
-
-    for _ in range(num_businesses):
-        annual_revenue = random.randint(100000, 300000)
-        universals_received = random.randint(100, 1000) * num_steps
-        businesses.append({
-            "Annual_Revenue": annual_revenue,
-            "Universals_Received": universals_received,
-            "Net_Gain": universals_received
-        })
-
-    for _ in range(num_landlords):
-        monthly_rent = random.randint(10000, 30000)
-        total_rent = monthly_rent * num_steps
-        reinvestment = total_rent * random.uniform(0.05, 0.3)
-        net_gain = total_rent - reinvestment
-        landlords.append({
-            "Total_Rent": total_rent,
-            "Reinvestment": reinvestment,
-            "Net_Gain": net_gain
-        })
-
-    return pd.DataFrame(people), pd.DataFrame(businesses), pd.DataFrame(landlords), universal_total, dollar_total
+from universal import (
+    EconomySummary,
+    LORENZ_COLUMNS,
+    RunProfile,
+    business_inflows,
+    column_distributions,
+    get_column,
+    histogram,
+    inequality_summary,
+    landlord_inflows,
+    mobility_statistics,
+    profiled,
+    range_mask,
+    sample_rows,
+    simulate_businesses,
+    simulate_landlords,
+    simulate_residents,
+    sort_index,
+    sortable_columns,
+    spawn_streams,
+    table_page,
+    with_derived_columns,
+)
+
+# Above these sizes the dashboard switches to histograms and sampled tables
+PER_AGENT_CHART_LIMIT = 1000
+TABLE_SAMPLE_SIZE = 100_000
+# Streamlit runs the script on a worker thread, and a parallel Numba kernel
+# called off the main thread hangs the process at exit under Numba's default
+# TBB threading layer, so the dashboard steps residents with NumPy
+STEP_KERNEL = "numpy"
 
 # ---------------------------
 # Streamlit Interface
 # ---------------------------
+# Each agent class is cached under its own parameters (businesses and landlords
+# also under those of the residents paying them), so moving one class's slider
+# only regenerates that class and what depends on it; a fixed seed makes
+# results reproducible. The profile a run fills in is not part of the key.
+@st.cache_data(max_entries=32, ttl=3600, show_spinner="Simulating residents...")
+def run_residents(num_people, num_steps, seed, _profile=None):
+    return simulate_residents(num_people, num_steps, spawn_streams(seed)["residents"], kernel=STEP_KERNEL,
+                              profile=_profile)
+
+
+@st.cache_resource(max_entries=2, ttl=3600, show_spinner="Simulating residents...")
+def run_residents_shared(num_people, num_steps, seed, _profile=None):
+    # Large populations are shared rather than copied out of the cache on every
+    # rerun; the dashboard only ever reads these tables
+    return simulate_residents(num_people, num_steps, spawn_streams(seed)["residents"], kernel=STEP_KERNEL,
+                              profile=_profile)
+
+
+@st.cache_data(max_entries=32, ttl=3600, show_spinner="Simulating businesses...")
+def run_businesses(num_people, num_businesses, num_steps, seed, _people_df, _profile=None):
+    # Businesses are paid by the residents, so they are keyed by the resident
+    # parameters too; the resident table itself is not hashed
+    streams = spawn_streams(seed)
+    with profiled(_profile, "business_routing"):
+        inflows = business_inflows(streams["spending_network"], _people_df, num_businesses)
+    return simulate_businesses(num_businesses, num_steps, streams["businesses"], inflows, _profile)
+
+
+@st.cache_data(max_entries=32, ttl=3600, show_spinner="Simulating landlords...")
+def run_landlords(num_people, num_landlords, num_steps, seed, _people_df, _profile=None):
+    # Landlords collect the residents' rent, so they are keyed like businesses
+    streams = spawn_streams(seed)
+    with profiled(_profile, "landlord_routing"):
+        rents = landlord_inflows(streams["tenancy"], _people_df, num_landlords)
+    return simulate_landlords(num_landlords, num_steps, streams["landlords"], rents, _profile)
+
+
+# Derived views are keyed by the resident parameters; the table itself is
+# passed as an underscore argument so Streamlit does not hash it
+@st.cache_data(max_entries=32, ttl=3600, show_spinner=False)
+def resident_distributions(params, _people_df):
+    # Fixed-size chart payloads: the browser never receives one value per resident
+    distributions = column_distributions(_people_df, ["Universal_Spending", "Dollar_Spending", "Net_Gain"])
+    # Lorenz curves, Gini coefficients and top-decile shares share one sort per column
+    lorenz, inequality = inequality_summary(_people_df, LORENZ_COLUMNS)
+    mobility = mobility_statistics(get_column(_people_df, "Wealth_Before").to_numpy(),
+                                   get_column(_people_df, "Wealth_After").to_numpy())
+    return distributions, lorenz, inequality, mobility
+
+
+@st.cache_data(max_entries=8, ttl=3600, show_spinner=False)
+def resident_sample(params, _people_df):
+    # Rows the resident table pages through: everyone, or a uniform sample at city scale
+    return sample_rows(_people_df, TABLE_SAMPLE_SIZE, seed=params[-1])
+
+
+@st.cache_data(max_entries=64, ttl=3600, show_spinner=False)
+def resident_sort_index(params, column, _table_df):
+    # One precomputed order per (population, column); later reruns only slice it
+    return sort_index(_table_df, column)
+
+
+def agent_chart(values):
+    # One bar per agent for small populations, a histogram beyond that
+    if len(values) <= PER_AGENT_CHART_LIMIT:
+        st.bar_chart(values)
+    else:
+        st.bar_chart(histogram(values.to_numpy())["count"])
+
+
+def resident_table(people_df, params):
+    total = len(people_df)
+    people_df = resident_sample(params, people_df)
+    sort_col, order_col, size_col = st.columns(3)
+    column = sort_col.selectbox("Sort by", sortable_columns(people_df), index=sortable_columns(people_df).index("Universals"))
+    ascending = order_col.radio("Order", ["Descending", "Ascending"], horizontal=True) == "Ascending"
+    page_size = size_col.selectbox("Rows per page", [25, 50, 100, 250], index=1)
+
+    income_col, universals_col = st.columns(2)
+    income = get_column(people_df, "Income")
+    universals = get_column(people_df, "Universals")
+    income_band = income_col.slider("Income band", int(income.min()), int(income.max()),
+                                    (int(income.min()), int(income.max())))
+    universals_range = universals_col.slider("Universals range", 0.0, float(universals.max()), (0.0, float(universals.max())))
+
+    ranges = {}
+    if income_band != (int(income.min()), int(income.max())):
+        ranges["Income"] = income_band
+    if universals_range != (0.0, float(universals.max())):
+        ranges["Universals"] = universals_range
+    mask = range_mask(people_df, ranges)
+
+    order = resident_sort_index(params, column, people_df)
+    num_pages = max(1, -(-(len(order) if mask is None else int(mask.sum())) // page_size))
+    page = st.number_input(f"Page (of {num_pages})", min_value=1, max_value=num_pages, value=1, step=1)
+    page_df, matching = table_page(people_df, order, int(page) - 1, page_size, ascending=ascending, mask=mask)
+    if len(people_df) < total:
+        st.caption(f"{matching:,} of a {len(people_df):,}-resident uniform sample match (population: {total:,})")
+    else:
+        st.caption(f"{matching:,} of {total:,} residents match")
+    st.dataframe(page_df)
+
+
 st.set_page_config(page_title="Dual Currency Simulation", layout="wide")
 st.title("Dual Currency Economic Simulation – Universals vs Dollars")
 
-num_people = st.sidebar.slider("Number of residents", 100, 1000, 500)
-num_businesses = st.sidebar.slider("Number of businesses", 10, 200, 100)
-num_landlords = st.sidebar.slider("Number of landlords", 1, 20, 10)
+large_mode = st.sidebar.toggle(
+    "Large-population mode",
+    help="City-scale populations (up to 10M residents) with aggregate charts and sampled tables.",
+)
+if large_mode:
+    num_people = st.sidebar.number_input("Number of residents", 1_000, 10_000_000, 1_000_000, step=100_000)
+    num_businesses = st.sidebar.number_input("Number of businesses", 10, 100_000, 5_000, step=1_000)
+    num_landlords = st.sidebar.number_input("Number of landlords", 1, 10_000, 500, step=100)
+else:
+    num_people = st.sidebar.slider("Number of residents", 100, 1000, 500)
+    num_businesses = st.sidebar.slider("Number of businesses", 10, 200, 100)
+    num_landlords = st.sidebar.slider("Number of landlords", 1, 20, 10)
 num_steps = st.sidebar.slider("Simulation steps (e.g., months)", 1, 50, 12)
-
-people_df, business_df, landlord_df, universal_total, dollar_total = simulate_dual_currency_economy(
-    num_people, num_businesses, num_landlords, num_steps
+seed = st.sidebar.number_input("Random seed", min_value=0, value=42, step=1)
+track_allocations = st.sidebar.checkbox(
+    "Track allocations", help="Adds allocation counters to the Performance tab; slows simulations down."
 )
 
+# Results of the current configuration sit in session state; the tab fragments
+# below read them from there and never trigger a simulation themselves
+results = st.session_state.setdefault("results", {})
+profile = RunProfile(track_allocations=track_allocations)
+for name, params, run in [
+    ("residents", (num_people, num_steps, int(seed)), run_residents_shared if large_mode else run_residents),
+    ("businesses", (num_people, num_businesses, num_steps, int(seed)),
+     lambda *params, _profile: run_businesses(*params, results["residents"][1], _profile)),
+    ("landlords", (num_people, num_landlords, num_steps, int(seed)),
+     lambda *params, _profile: run_landlords(*params, results["residents"][1], _profile)),
+]:
+    if name not in results or results[name][0] != params:
+        results[name] = (params, *run(*params, _profile=profile))
+# Only phases that actually ran are recorded; cache hits leave the profile empty
+if profile.phases:
+    st.session_state["profile"] = profile
+
+
 # ---------------------------
 # Tabs for Output
 # ---------------------------
-tab1, tab2, tab3, tab4 = st.tabs(["Residents", "Businesses", "Landlords", "Summary & Indicators"])
-
-with tab1:
+# Each tab is its own fragment: interacting with a widget inside one tab only
+# reruns that tab, not the sidebar, the simulation or the other tabs
+@st.fragment
+def residents_tab():
+    params, people_df, _ = st.session_state["results"]["residents"]
     st.subheader("Resident Summary")
-    st.dataframe(people_df.sort_values("Universals", ascending=False))
-    st.subheader("Universal Spending Distribution")
-    st.bar_chart(people_df["Universal_Spending"])
-    st.subheader("Dollar Spending Distribution")
-    st.bar_chart(people_df["Dollar_Spending"])
-    st.subheader("Net Wealth Gain from Universals")
-    st.bar_chart(people_df["Net_Gain"])
+    resident_table(people_df, params)
+    distributions, lorenz, *_ = resident_distributions(params, people_df)
+    for column, title in [
+        ("Universal_Spending", "Universal Spending Distribution"),
+        ("Dollar_Spending", "Dollar Spending Distribution"),
+        ("Net_Gain", "Net Wealth Gain from Universals"),
+    ]:
+        st.subheader(title)
+        chart_col, quantile_col = st.columns([3, 1])
+        chart_col.bar_chart(distributions[column]["histogram"]["count"])
+        quantile_col.dataframe(distributions[column]["quantiles"].rename("value"))
+    st.subheader("Lorenz Curves")
+    st.line_chart(lorenz)
 
-with tab2:
+
+@st.fragment
+def businesses_tab():
+    _, business_df, _ = st.session_state["results"]["businesses"]
     st.subheader("Business Summary")
-    st.dataframe(business_df)
+    st.dataframe(with_derived_columns(sample_rows(business_df, TABLE_SAMPLE_SIZE)))
     st.subheader("Universals Received by Businesses")
-    st.bar_chart(business_df["Universals_Received"])
+    agent_chart(business_df["Universals_Received"])
+    st.subheader("Dollars Received by Businesses")
+    agent_chart(business_df["Dollars_Received"])
 
-with tab3:
+
+@st.fragment
+def landlords_tab():
+    _, landlord_df, _ = st.session_state["results"]["landlords"]
     st.subheader("Landlord Summary")
-    st.dataframe(landlord_df)
+    st.dataframe(with_derived_columns(sample_rows(landlord_df, TABLE_SAMPLE_SIZE)))
     st.subheader("Landlord Net Gain (after reinvestment)")
-    st.bar_chart(landlord_df["Net_Gain"])
+    agent_chart(get_column(landlord_df, "Net_Gain"))
 
-with tab4:
+
+@st.fragment
+def summary_tab():
+    results = st.session_state["results"]
     st.subheader("Macroeconomic Indicators")
-    total_universals = people_df["Universals"].sum() + business_df["Universals_Received"].sum()
-    total_income = people_df["Income"].sum()
-    total_rent = landlord_df["Total_Rent"].sum()
-    total_capital_before = people_df["Wealth_Before"].sum()
-    total_capital_after = people_df["Wealth_After"].sum()
-    total_net_gain = people_df["Net_Gain"].sum() + business_df["Net_Gain"].sum() + landlord_df["Net_Gain"].sum()
-
-    purchasing_power_gain = ((total_capital_after - total_capital_before) / total_capital_before * 100) if total_capital_before > 0 else 0
-
-    st.metric("Total Universals Created", f"€{total_universals:,.0f}")
-    st.metric("Total Dollar Spending", f"€{dollar_total:,.0f}")
-    st.metric("Total Income (Residents)", f"€{total_income:,.0f}")
-    st.metric("Total Rent Extracted (Landlords)", f"€{total_rent:,.0f}")
-    st.metric("Wealth Before Universals", f"€{total_capital_before:,.0f}")
-    st.metric("Wealth After Universals", f"€{total_capital_after:,.0f}")
-    st.metric("Purchasing Power Gain (%)", f"{purchasing_power_gain:.1f}%")
-    st.metric("Net Value Gained by All Participants", f"€{total_net_gain:,.0f}")
+    summary = EconomySummary.from_totals(
+        results["residents"][2], results["businesses"][2], results["landlords"][2]
+    )
+
+    st.metric("Total Universals Created", f"€{summary.total_universals:,.0f}")
+    st.metric("Total Dollar Spending", f"€{summary.total_dollar_spending:,.0f}")
+    st.metric("Total Income (Residents)", f"€{summary.total_income:,.0f}")
+    st.metric("Total Rent Extracted (Landlords)", f"€{summary.total_rent:,.0f}")
+    st.metric("Wealth Before Universals", f"€{summary.total_capital_before:,.0f}")
+    st.metric("Wealth After Universals", f"€{summary.total_capital_after:,.0f}")
+    st.metric("Purchasing Power Gain (%)", f"{summary.purchasing_power_gain:.1f}%")
+    st.metric("Net Value Gained by All Participants", f"€{summary.total_net_gain:,.0f}")
+
+    st.subheader("Inequality")
+    params, people_df, _ = results["residents"]
+    inequality, mobility = resident_distributions(params, people_df)[2:]
+    before, after = inequality.loc["Wealth_Before"], inequality.loc["Wealth_After"]
+    gini_col, top_col = st.columns(2)
+    gini_col.metric("Wealth Gini (after universals)", f"{after['gini']:.3f}",
+                    delta=f"{after['gini'] - before['gini']:+.3f} vs before", delta_color="inverse")
+    top_col.metric("Top 10% Wealth Share (after universals)", f"{after['top_decile_share']:.1%}",
+                   delta=f"{after['top_decile_share'] - before['top_decile_share']:+.1%} vs before",
+                   delta_color="inverse")
+    st.dataframe(inequality.rename(columns={"gini": "Gini", "top_decile_share": "Top 10% share"}))
+    rank_col, decile_col = st.columns(2)
+    rank_col.metric("Wealth Rank Correlation (before vs after)", f"{mobility['rank_correlation']:.3f}")
+    decile_col.metric("Residents Changing Wealth Decile", f"{mobility['decile_mobility']:.1%}")
 
     st.caption("This dashboard distinguishes real (dollar) value from symbolic capital redistribution (universals), revealing how a dual-currency system transforms economic outcomes.")
+
+
+@st.fragment
+def performance_tab():
+    profile = st.session_state.get("profile")
+    if profile is None:
+        st.info("Every result in this session came from the cache; change a parameter to profile a simulation.")
+        return
+    st.subheader("Simulation Phases")
+    st.caption(f"Last simulation that ran took {profile.total_s:.3f}s; classes served from the cache are not listed.")
+    profile_df = profile.to_frame().set_index("phase")
+    st.bar_chart(profile_df["wall_s"])
+    st.dataframe(profile_df if profile.track_allocations else profile_df[["calls", "wall_s"]])
+
+
+tab1, tab2, tab3, tab4, tab5 = st.tabs(["Residents", "Businesses", "Landlords", "Summary & Indicators", "Performance"])
+
+with tab1:
+    residents_tab()
+
+with tab2:
+    businesses_tab()
+
+with tab3:
+    landlords_tab()
+
+with tab4:
+    summary_tab()
+
+with tab5:
+    performance_tab()
@@ -0,0 +1,36 @@
+import pandas as pd
+import pytest
+
+from universal.checkpoint import list_checkpoints, resume_run, run_checkpointed
+from universal.engine import run_economy
+
+PARAMS = (5_000, 20, 3, 12)
+
+
+class Crash(Exception):
+    pass
+
+
+def crash_at(step):
+    def on_step(current, residents):
+        if current == step:
+            raise Crash
+    return on_step
+
+
+def test_resumed_run_matches_uninterrupted_run(tmp_path):
+    expected = run_economy(*PARAMS, seed=7, kernel="numpy")
+    with pytest.raises(Crash):
+        run_checkpointed(*PARAMS, tmp_path, every=3, seed=7, keep=2, kernel="numpy", on_step=crash_at(8))
+    assert [path.name for path in list_checkpoints(tmp_path)] == ["step=000003", "step=000006"]
+
+    resumed = resume_run(tmp_path, every=3, kernel="numpy")
+    assert resumed.summary == expected.summary
+    for table in ("people_df", "business_df", "landlord_df"):
+        pd.testing.assert_frame_equal(getattr(resumed, table), getattr(expected, table), check_exact=True)
+    assert [path.name for path in list_checkpoints(tmp_path)] == ["step=000006", "step=000009"]
+
+
+def test_resume_without_checkpoint(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        resume_run(tmp_path)
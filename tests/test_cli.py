@@ -0,0 +1,24 @@
+import pytest
+
+from universal.cli import main
+
+OUTPUTS = ("people.csv", "businesses.csv", "landlords.csv", "indicators.json", "inequality.csv", "quantiles.csv")
+
+
+def test_store_and_chunked_runs_write_the_same_files(tmp_path):
+    args = ["--people", "3000", "--businesses", "20", "--landlords", "3", "--steps", "4", "--seed", "5",
+            "--kernel", "numpy"]
+    main(args + ["--out", str(tmp_path / "chunked"), "--chunk-size", "131072"])
+    main(args + ["--out", str(tmp_path / "stored"), "--store", str(tmp_path / "store")])
+    for name in OUTPUTS:
+        assert (tmp_path / "stored" / name).read_bytes() == (tmp_path / "chunked" / name).read_bytes(), name
+
+
+def test_empty_population(tmp_path):
+    assert main(["--people", "0", "--out", str(tmp_path)]) == 0
+
+
+@pytest.mark.parametrize("args", [["--landlords", "0"], ["--chunk-size", "1000"]])
+def test_invalid_runs_are_rejected(tmp_path, args):
+    with pytest.raises(SystemExit):
+        main(args + ["--out", str(tmp_path)])
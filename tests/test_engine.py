@@ -0,0 +1,71 @@
+from fractions import Fraction
+
+import numpy as np
+import pytest
+
+from universal.engine import (
+    column_total,
+    exact_total,
+    generate_residents,
+    run_economy,
+    spawn_streams,
+    step_residents,
+)
+
+
+def residents(num_people=50_000, seed=1):
+    return generate_residents(spawn_streams(seed)["residents"], num_people)
+
+
+def test_numba_kernel_matches_numpy_kernel():
+    kernels = pytest.importorskip("universal.kernels")
+    if not kernels.HAVE_NUMBA:
+        pytest.skip("numba is not installed")
+    expected, actual = residents(), residents()
+    for _ in range(6):
+        step_residents(expected)
+        kernels.step_residents_jit(actual)
+    for name, values in expected.items():
+        np.testing.assert_array_equal(actual[name], values, err_msg=name)
+
+
+def test_residents_only_spend_what_they_have():
+    state = residents()
+    for _ in range(24):
+        step_residents(state)
+    assert state["capital"].min() >= 0
+    assert state["universals"].min() >= 0
+
+
+def test_exact_total_is_exact_and_order_free():
+    values = (np.random.default_rng(0).standard_normal(100_000) * 1e5).astype(np.float32)
+    assert exact_total(values) == sum(Fraction(float(value)) for value in values)
+    assert exact_total(values[:31_337]) + exact_total(values[31_337:]) == exact_total(values)
+    assert exact_total(np.arange(10, dtype=np.int32)) == 45
+    assert exact_total(np.zeros(0, dtype=np.float32)) == 0
+
+
+def test_empty_population():
+    result = run_economy(0, 5, 2, 3, seed=0)
+    assert len(result.people_df) == 0
+    assert result.summary.total_universals == 0
+
+
+def test_residents_need_someone_to_pay():
+    with pytest.raises(ValueError):
+        run_economy(100, 0, 2, 3, seed=0)
+    with pytest.raises(ValueError):
+        run_economy(100, 5, 0, 3, seed=0)
+
+
+def test_runs_are_reproducible():
+    assert run_economy(2_000, 10, 2, 4, seed=5).summary == run_economy(2_000, 10, 2, 4, seed=5).summary
+
+
+def test_routed_money_is_conserved():
+    result = run_economy(20_000, 30, 4, 6, seed=3, kernel="numpy")
+    people, businesses, landlords = result.people_df, result.business_df, result.landlord_df
+    assert column_total(businesses, "Universals_Received") == pytest.approx(column_total(people, "Universal_Spending"))
+    assert column_total(businesses, "Dollars_Received") == pytest.approx(column_total(people, "Dollar_Spending"))
+    assert column_total(landlords, "Total_Rent") == pytest.approx(column_total(people, "Rent_Paid"))
+    assert landlords["Tenants"].sum() == len(people)
@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+from universal.aggregates import (
+    DEFAULT_QUANTILES,
+    QUANTILE_COLUMNS,
+    LorenzSketch,
+    QuantileSketch,
+    lorenz_statistics,
+    mobility_statistics,
+)
+from universal.streaming import parallel_quantile_sketches
+
+VALUES = np.random.default_rng(0).lognormal(10, 1, size=200_000)
+CHUNKS = np.array_split(VALUES, 7)
+
+
+def rank_errors(sketch, values):
+    # Distance between each requested quantile and the rank of its estimate
+    quantiles = np.array(DEFAULT_QUANTILES)
+    estimates = sketch.quantiles(quantiles).to_numpy()
+    ranks = np.searchsorted(np.sort(values), estimates, side="right") / len(values)
+    return np.abs(ranks - quantiles)
+
+
+def test_quantile_sketch_rank_error_within_bound():
+    sketch = QuantileSketch().update(VALUES)
+    assert rank_errors(sketch, VALUES).max() <= sketch.normalized_rank_error
+    assert sketch.quantiles([0.0, 1.0]).tolist() == [VALUES.min(), VALUES.max()]
+    assert sum(len(level) for level in sketch.levels) <= 3 * sketch.k
+
+
+def test_merged_quantile_sketches_cover_every_chunk():
+    sketches = [QuantileSketch(seed=i).update(chunk) for i, chunk in enumerate(CHUNKS)]
+    merged = sketches[0]
+    for sketch in sketches[1:]:
+        merged.merge(sketch)
+    assert merged.count == len(VALUES)
+    assert rank_errors(merged, VALUES).max() <= merged.normalized_rank_error
+    with pytest.raises(ValueError):
+        merged.merge(QuantileSketch(k=100))
+
+
+def test_parallel_sketches_merge_column_by_column():
+    first = parallel_quantile_sketches(20_000, 2, seed=1, chunk_size=8192, max_workers=2, kernel="numpy")
+    second = parallel_quantile_sketches(20_000, 2, seed=2, chunk_size=8192, max_workers=2, kernel="numpy")
+    assert first["Net_Gain"] is not first["Universals"]
+    for name in QUANTILE_COLUMNS:
+        first[name].merge(second[name])
+    assert {name: first[name].count for name in QUANTILE_COLUMNS} == dict.fromkeys(QUANTILE_COLUMNS, 40_000)
+
+
+def test_lorenz_sketch_matches_exact_measures():
+    exact = lorenz_statistics(VALUES)[1]
+    merged = LorenzSketch()
+    for chunk in CHUNKS:
+        merged.merge(LorenzSketch().update(chunk))
+    for sketch in (LorenzSketch().update(VALUES), merged):
+        measures = sketch.statistics()[1]
+        for name, value in exact.items():
+            assert measures[name] == pytest.approx(value, rel=sketch.relative_accuracy)
+
+
+def test_lorenz_statistics_of_equal_values():
+    curve, measures = lorenz_statistics(np.full(10, 3.0))
+    assert measures["gini"] == pytest.approx(0.0)
+    assert measures["top_decile_share"] == pytest.approx(0.1)
+    np.testing.assert_allclose(curve["value_share"], curve["population_share"])
+
+
+def test_mobility_statistics():
+    assert mobility_statistics(VALUES, VALUES * 2) == {"rank_correlation": 1.0, "decile_mobility": 0.0}
+    reversed_ranks = mobility_statistics(VALUES, -VALUES)
+    assert reversed_ranks["rank_correlation"] == pytest.approx(-1.0)
+    assert reversed_ranks["decile_mobility"] == pytest.approx(1.0)
@@ -0,0 +1,89 @@
+"""Dual-currency (universals vs dollars) economic simulation."""
+from .aggregates import (
+    INEQUALITY_COLUMNS,
+    LORENZ_COLUMNS,
+    MOBILITY_COLUMNS,
+    LorenzSketch,
+    QUANTILE_COLUMNS,
+    QUANTILE_SOURCES,
+    QuantileSketch,
+    column_distributions,
+    histogram,
+    inequality_summary,
+    lorenz_curve,
+    lorenz_curves,
+    lorenz_statistics,
+    mobility_statistics,
+    quantile_sources,
+    quantile_summary,
+    sketch_inequality_summary,
+    value_ranks,
+)
+from .checkpoint import (
+    latest_checkpoint,
+    list_checkpoints,
+    load_checkpoint,
+    resume_run,
+    run_checkpointed,
+    save_checkpoint,
+)
+from .engine import (
+    AGENT_CLASSES,
+    BASKET_PRICE,
+    CAPTURE_RATIO,
+    COLUMN_ORDER,
+    DERIVED_COLUMNS,
+    EconomySummary,
+    INT_DTYPE,
+    MONEY_DTYPE,
+    MONTHS_PER_YEAR,
+    NETWORK_CHUNK_SIZE,
+    REAL_PAYMENT,
+    RESIDENT_BLOCK_SIZE,
+    SPENDING_EDGES,
+    STREAM_NAMES,
+    STEP_KERNELS,
+    SimulationResult,
+    TOTAL_COLUMNS,
+    UNIVERSAL_PAYMENT,
+    add_totals,
+    business_inflows,
+    agent_frame,
+    assign_landlords,
+    check_agent_counts,
+    child_sequence,
+    class_totals,
+    column_total,
+    exact_total,
+    generate_residents,
+    get_column,
+    landlord_inflows,
+    macro_indicators,
+    network_slices,
+    resident_frame,
+    resident_totals,
+    resolve_step_kernel,
+    route_spending,
+    run_economy,
+    simulate_businesses,
+    simulate_dual_currency_economy,
+    simulate_landlords,
+    simulate_residents,
+    spawn_streams,
+    spending_network,
+    step_residents,
+    with_derived_columns,
+)
+from .ensemble import replica_seeds, run_ensemble, run_replica, summarize_ensemble
+from .export import compact_frame, open_dataset, write_run, write_table
+from .paging import range_mask, sample_rows, sort_index, sortable_columns, table_page
+from .profiling import PROFILE_COLUMNS, RunProfile, profiled
+from .store import STORE_BLOCK_SIZE, open_resident_store, simulate_residents_to_store
+from .streaming import (
+    DEFAULT_CHUNK_SIZE,
+    iter_resident_chunks,
+    parallel_quantile_sketches,
+    sketch_chunk,
+    stream_dual_currency_economy,
+)
+from .sweep import parameter_grid, run_sweep
@@ -0,0 +1,188 @@
+"""Benchmark harness for the engine: ``python -m universal.bench --out bench.json``.
+
+Each population size runs in a fresh worker process, so the peak RSS
+recorded for a size is not inflated by earlier, larger runs. Within a size,
+the RSS high-water mark is reset before each phase where the platform allows
+it (Linux); elsewhere peak_rss_bytes is the process maximum up to that phase.
+"""
+import argparse
+import json
+import multiprocessing
+import platform
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from .engine import (
+    generate_residents,
+    resident_frame,
+    resident_totals,
+    run_economy,
+    spawn_streams,
+    step_residents,
+    with_derived_columns,
+)
+from .kernels import HAVE_NUMBA, step_residents_jit
+
+DEFAULT_SIZES = (10 ** 3, 10 ** 5, 10 ** 6, 10 ** 7)
+
+
+def reset_peak_rss():
+    # Linux lets a process reset its RSS high-water mark (VmHWM) to the
+    # current RSS; elsewhere ru_maxrss only ever grows, so the recorded peak
+    # is the process maximum so far rather than the phase's own
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def peak_rss_bytes():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    # ru_maxrss is reported in kilobytes on Linux and in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def timed(rows, num_people, phase, fn):
+    reset_peak_rss()
+    start = time.perf_counter()
+    result = fn()
+    wall = time.perf_counter() - start
+    rows.append({"num_people": num_people, "phase": phase, "wall_s": wall, "peak_rss_bytes": peak_rss_bytes()})
+    return result
+
+
+def traced(rows, num_people, phase, fn):
+    # numpy reports its buffers to tracemalloc, so this covers array allocations
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        result = fn()
+        after, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    rows.append({"alloc_peak_bytes": peak - before, "alloc_net_bytes": after - before})
+    return result
+
+
+def run_phases(measure, num_people, num_businesses, num_landlords, num_steps, seed):
+    # Phase by phase on the engine's building blocks ...
+    streams = spawn_streams(seed)
+    residents = measure("generate", lambda: generate_residents(streams["residents"], num_people))
+
+    def run_steps():
+        for _ in range(num_steps):
+            step_residents(residents)
+
+    measure("step", run_steps)
+    if HAVE_NUMBA:
+        def run_jit_steps():
+            for _ in range(num_steps):
+                step_residents_jit(residents)
+
+        measure("step_numba", run_jit_steps)
+    measure("frame", lambda: with_derived_columns(resident_frame(residents, num_steps)))
+    measure("aggregate", lambda: resident_totals(residents))
+    del residents
+
+    # ... then end to end
+    measure("simulate", lambda: run_economy(num_people, num_businesses, num_landlords, num_steps, seed=seed))
+
+
+def bench_size(num_people, num_businesses, num_landlords, num_steps, seed):
+    if HAVE_NUMBA:
+        # Compile (or load from Numba's cache) and start its threads before any phase
+        step_residents_jit(generate_residents(spawn_streams(seed)["residents"], 1))
+
+    # Tracing slows allocation-heavy code down, so wall times and RSS come from
+    # an untraced pass and allocation counters from a second, traced one
+    rows, allocations = [], []
+    run_phases(lambda phase, fn: timed(rows, num_people, phase, fn),
+               num_people, num_businesses, num_landlords, num_steps, seed)
+    run_phases(lambda phase, fn: traced(allocations, num_people, phase, fn),
+               num_people, num_businesses, num_landlords, num_steps, seed)
+    return [dict(row, **allocated) for row, allocated in zip(rows, allocations)]
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, num_businesses=100, num_landlords=10, num_steps=12, seed=0):
+    rows = []
+    context = multiprocessing.get_context("spawn")
+    for num_people in sizes:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            rows += pool.submit(bench_size, num_people, num_businesses, num_landlords, num_steps, seed).result()
+
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "machine": platform.machine(),
+        "params": {"num_businesses": num_businesses, "num_landlords": num_landlords, "num_steps": num_steps, "seed": seed},
+        "results": rows,
+    }
+
+
+def compare(baseline, current):
+    # Wall time and allocation ratios (current / baseline) per size and phase
+    key = ["num_people", "phase"]
+    merged = pd.DataFrame(baseline["results"]).merge(
+        pd.DataFrame(current["results"]), on=key, suffixes=("_base", "_new")
+    )
+    return pd.DataFrame({
+        "num_people": merged["num_people"],
+        "phase": merged["phase"],
+        "wall_ratio": merged["wall_s_new"] / merged["wall_s_base"],
+        "alloc_peak_ratio": merged["alloc_peak_bytes_new"] / merged["alloc_peak_bytes_base"],
+    })
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m universal.bench", description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=float, nargs="+", default=DEFAULT_SIZES,
+                        help="resident counts to benchmark (e.g. 1e3 1e5)")
+    parser.add_argument("--steps", type=int, default=12)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="write the results as JSON to this file")
+    parser.add_argument("--compare", metavar="BASELINE", help="JSON results of an earlier run to compare against")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks([int(size) for size in args.sizes], num_steps=args.steps, seed=args.seed)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+
+    with pd.option_context("display.width", 120):
+        print(pd.DataFrame(results["results"]).to_string(index=False))
+        if args.compare:
+            with open(args.compare) as f:
+                print(compare(json.load(f), results).to_string(index=False))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
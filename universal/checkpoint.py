@@ -0,0 +1,130 @@
+"""Periodic checkpoints of long runs, resumable bit-exactly after a crash."""
+import json
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+
+from .engine import run_economy
+
+CHECKPOINT_FILE = "checkpoint.json"
+RUN_PARAMETERS = ("num_people", "num_businesses", "num_landlords", "num_steps")
+
+
+def run_spec(num_people, num_businesses, num_landlords, num_steps, seed=None):
+    # Everything needed to restart a run: its parameters and the root
+    # SeedSequence every random stream derives from. Fresh entropy (seed=None)
+    # is drawn here, so that it can be recorded too.
+    root = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    return {
+        "num_people": num_people,
+        "num_businesses": num_businesses,
+        "num_landlords": num_landlords,
+        "num_steps": num_steps,
+        "entropy": root.entropy,
+        "spawn_key": list(root.spawn_key),
+        "pool_size": root.pool_size,
+    }
+
+
+def spec_seed(spec):
+    return np.random.SeedSequence(spec["entropy"], spawn_key=tuple(spec["spawn_key"]), pool_size=spec["pool_size"])
+
+
+def checkpoint_path(root, step):
+    return Path(root) / f"step={step:06d}"
+
+
+def list_checkpoints(root):
+    # Complete checkpoints only, oldest first; a directory still being written
+    # carries a .tmp suffix until it is renamed into place
+    return sorted(
+        path for path in Path(root).glob("step=*")
+        if path.suffix != ".tmp" and (path / CHECKPOINT_FILE).exists()
+    )
+
+
+def fsync_directory(path):
+    # Makes the entries of a directory (files created or renamed in it) durable
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def save_checkpoint(root, spec, step, residents, keep=2):
+    # One .npy file per state array plus the run spec. The checkpoint becomes
+    # visible with an atomic rename, so a crash mid-write leaves the previous
+    # one intact. Files and directories are fsynced before and after the
+    # rename, so after a power loss a visible checkpoint is a complete one.
+    # Only the newest `keep` checkpoints are kept.
+    path = checkpoint_path(root, step)
+    tmp = path.with_suffix(".tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+    for name, values in residents.items():
+        with open(tmp / f"{name}.npy", "wb") as f:
+            np.save(f, values)
+            f.flush()
+            os.fsync(f.fileno())
+    with open(tmp / CHECKPOINT_FILE, "w") as f:
+        json.dump(dict(spec, step=step), f)
+        f.flush()
+        os.fsync(f.fileno())
+    fsync_directory(tmp)
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp, path)
+    fsync_directory(root)
+    for old in list_checkpoints(root)[:-keep]:
+        shutil.rmtree(old)
+    return path
+
+
+def load_checkpoint(path):
+    # Returns (spec with its step, residents). Arrays are memory-mapped
+    # copy-on-write: pages are read lazily and stepping never writes back to
+    # the checkpoint files.
+    path = Path(path)
+    with open(path / CHECKPOINT_FILE) as f:
+        spec = json.load(f)
+    residents = {file.stem: np.asarray(np.load(file, mmap_mode="c")) for file in sorted(path.glob("*.npy"))}
+    return spec, residents
+
+
+def latest_checkpoint(root):
+    checkpoints = list_checkpoints(root)
+    if not checkpoints:
+        raise FileNotFoundError(f"no checkpoint found under {root}")
+    return checkpoints[-1]
+
+
+def checkpoint_hook(root, spec, every, keep=2, on_step=None):
+    # on_step hook saving the state every `every` steps (not after the last
+    # one, which completes the run), then calling on_step if given
+    def hook(step, residents):
+        if every and step % every == 0 and step != spec["num_steps"]:
+            save_checkpoint(root, spec, step, residents, keep)
+        if on_step is not None:
+            on_step(step, residents)
+    return hook
+
+
+def run_checkpointed(num_people, num_businesses, num_landlords, num_steps, root, every, seed=None, keep=2,
+                     kernel="auto", on_step=None):
+    # run_economy, checkpointing the residents into root every `every` steps
+    spec = run_spec(num_people, num_businesses, num_landlords, num_steps, seed)
+    return run_economy(*(spec[name] for name in RUN_PARAMETERS), seed=spec_seed(spec),
+                       on_step=checkpoint_hook(root, spec, every, keep, on_step), kernel=kernel)
+
+
+def resume_run(root, every=0, keep=2, kernel="auto", on_step=None):
+    # Continues the run of the newest checkpoint under root (and keeps
+    # checkpointing if every is given). Stepping is deterministic and every
+    # other random stream derives from the recorded root seed, so the result
+    # is bit-identical to an uninterrupted run.
+    spec, residents = load_checkpoint(latest_checkpoint(root))
+    return run_economy(*(spec[name] for name in RUN_PARAMETERS), seed=spec_seed(spec),
+                       on_step=checkpoint_hook(root, spec, every, keep, on_step), kernel=kernel,
+                       resume=(spec["step"], residents))
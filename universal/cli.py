@@ -0,0 +1,202 @@
+"""Headless command-line runner: ``python -m universal --out DIR ...``."""
+import argparse
+import json
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .aggregates import (
+    LORENZ_COLUMNS,
+    QUANTILE_COLUMNS,
+    QUANTILE_SOURCES,
+    LorenzSketch,
+    QuantileSketch,
+    inequality_summary,
+    quantile_sources,
+    quantile_summary,
+    sketch_inequality_summary,
+)
+from .checkpoint import RUN_PARAMETERS, latest_checkpoint, load_checkpoint, resume_run, run_checkpointed
+from .engine import (
+    NETWORK_CHUNK_SIZE,
+    STEP_KERNELS,
+    get_column,
+    resident_frame,
+    run_economy,
+    simulate_businesses,
+    simulate_landlords,
+    spawn_streams,
+    with_derived_columns,
+)
+from .ensemble import run_ensemble
+from .export import write_table
+from .store import STORE_BLOCK_SIZE
+from .streaming import stream_dual_currency_economy
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m universal",
+        description="Run the dual-currency simulation without the Streamlit UI and write the results to disk.",
+    )
+    parser.add_argument("--people", type=int, default=500, help="number of residents")
+    parser.add_argument("--businesses", type=int, default=100, help="number of businesses")
+    parser.add_argument("--landlords", type=int, default=10, help="number of landlords")
+    parser.add_argument("--steps", type=int, default=12, help="simulation steps (months)")
+    parser.add_argument("--seed", type=int, default=None, help="root seed; omit for fresh entropy")
+    parser.add_argument("--replicas", type=int, default=0,
+                        help="run a Monte Carlo ensemble of this many replicas instead of a single run")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes for ensembles")
+    parser.add_argument("--kernel", choices=STEP_KERNELS, default="auto",
+                        help="resident step kernel; auto uses Numba when installed")
+    parser.add_argument("--out", type=Path, required=True, help="output directory")
+    parser.add_argument("--format", choices=("csv", "parquet"), default="csv", help="format of the agent tables")
+    parser.add_argument("--run-id", default=None, help="run id partition for Parquet output (default: timestamp)")
+    parser.add_argument("--snapshot-every", type=int, default=0, metavar="K",
+                        help="with Parquet output, also write the resident table every K steps")
+    parser.add_argument("--chunk-size", type=int, default=0, metavar="N",
+                        help="simulate and write residents in chunks of N (a multiple of 131072) to bound memory")
+    parser.add_argument("--store", type=Path, default=None, metavar="DIR",
+                        help="keep resident state in memory-mapped files under DIR (populations larger than RAM)")
+    parser.add_argument("--checkpoint-dir", type=Path, default=None, help="directory for resumable checkpoints")
+    parser.add_argument("--checkpoint-every", type=int, default=0, metavar="K",
+                        help="checkpoint the resident state every K steps")
+    parser.add_argument("--resume", action="store_true",
+                        help="continue the run of the newest checkpoint in --checkpoint-dir; "
+                             "its parameters replace --people/--businesses/--landlords/--steps/--seed")
+    return parser
+
+
+def write_json(path, data):
+    with open(path, "w") as f:
+        json.dump({key: float(value) for key, value in data.items()}, f, indent=2)
+
+
+def write_quantiles(args, quantiles):
+    # One row per resident column, one column per quantile; quantiles is keyed
+    # by the sketched columns, the others are copied from their source
+    quantiles = {name: quantiles[QUANTILE_SOURCES.get(name, name)] for name in QUANTILE_COLUMNS}
+    pd.DataFrame(quantiles).T.to_csv(args.out / "quantiles.csv", index_label="column")
+
+
+def write_frame(args, run_id, table, df, part=0):
+    if args.format == "parquet":
+        write_table(args.out, table, run_id, args.steps, df, part=part)
+    else:
+        with_derived_columns(df).to_csv(args.out / f"{table}.csv", index=False, mode="a" if part else "w", header=not part)
+
+
+def resident_sketches():
+    # Lorenz and percentile sketches of the resident columns, filled part by part
+    return {name: LorenzSketch() for name in LORENZ_COLUMNS}, {name: QuantileSketch() for name in quantile_sources()}
+
+
+def write_sketches(args, sketches, quantile_sketches):
+    sketch_inequality_summary(sketches)[1].to_csv(args.out / "inequality.csv", index_label="column")
+    write_quantiles(args, {name: sketch.quantiles() for name, sketch in quantile_sketches.items()})
+
+
+def run_chunked(args, run_id):
+    # Residents never exist in memory all at once; indicators are running totals.
+    # One root sequence, so businesses and landlords match the streamed run even without --seed
+    root = np.random.SeedSequence(args.seed)
+    summary = None
+    inflows = {}
+    sketches, quantile_sketches = resident_sketches()
+    chunks = stream_dual_currency_economy(
+        args.people, args.businesses, args.landlords, args.steps, seed=root, chunk_size=args.chunk_size,
+        kernel=args.kernel, inflows=inflows, sketches=[*sketches.items(), *quantile_sketches.items()],
+    )
+    for part, (chunk, summary) in enumerate(chunks):
+        write_frame(args, run_id, "people", chunk, part)
+
+    streams = spawn_streams(root)
+    business_df = simulate_businesses(args.businesses, args.steps, streams["businesses"], inflows["businesses"])[0]
+    landlord_df = simulate_landlords(args.landlords, args.steps, streams["landlords"], inflows["landlords"])[0]
+    write_frame(args, run_id, "businesses", business_df)
+    write_frame(args, run_id, "landlords", landlord_df)
+    if summary is not None:
+        write_json(args.out / "indicators.json", summary.as_dict())
+        write_sketches(args, sketches, quantile_sketches)
+
+
+def run_stored(args, run_id):
+    # The resident table is a view over the --store files; it is written, and
+    # its inequality and percentiles sketched, one store block at a time, so
+    # derived columns never exist for the whole population
+    result = run_economy(args.people, args.businesses, args.landlords, args.steps, seed=args.seed,
+                         kernel=args.kernel, store=args.store)
+    sketches, quantile_sketches = resident_sketches()
+    for part, lo in enumerate(range(0, max(args.people, 1), STORE_BLOCK_SIZE)):
+        block = result.people_df.iloc[lo:lo + STORE_BLOCK_SIZE]
+        write_frame(args, run_id, "people", block, part)
+        for name, sketch in [*sketches.items(), *quantile_sketches.items()]:
+            sketch.update(get_column(block, name).to_numpy())
+    write_frame(args, run_id, "businesses", result.business_df)
+    write_frame(args, run_id, "landlords", result.landlord_df)
+    write_json(args.out / "indicators.json", result.summary.as_dict())
+    write_sketches(args, sketches, quantile_sketches)
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.chunk_size and (args.replicas or args.snapshot_every):
+        parser.error("--chunk-size cannot be combined with --replicas or --snapshot-every")
+    if args.chunk_size % NETWORK_CHUNK_SIZE:
+        parser.error(f"--chunk-size must be a multiple of {NETWORK_CHUNK_SIZE}, so chunked results match a serial run")
+    if (args.checkpoint_every or args.resume) and not args.checkpoint_dir:
+        parser.error("--checkpoint-every and --resume require --checkpoint-dir")
+    if args.checkpoint_dir and (args.chunk_size or args.replicas):
+        parser.error("checkpoints cannot be combined with --chunk-size or --replicas")
+    if args.store and (args.chunk_size or args.replicas or args.snapshot_every or args.checkpoint_dir):
+        parser.error("--store cannot be combined with --chunk-size, --replicas, --snapshot-every or checkpoints")
+    if args.resume:
+        # The checkpointed run's parameters replace the command-line ones
+        try:
+            spec = load_checkpoint(latest_checkpoint(args.checkpoint_dir))[0]
+        except FileNotFoundError as error:
+            parser.error(str(error))
+        args.people, args.businesses, args.landlords, args.steps = (spec[name] for name in RUN_PARAMETERS)
+    if args.people > 0 and (args.businesses <= 0 or args.landlords <= 0):
+        parser.error("--businesses and --landlords must be at least 1 when there are residents")
+    args.out.mkdir(parents=True, exist_ok=True)
+    params = (args.people, args.businesses, args.landlords, args.steps)
+
+    if args.replicas:
+        samples, summary = run_ensemble(*params, args.replicas, seed=args.seed, max_workers=args.workers,
+                                        kernel=args.kernel)
+        samples.to_csv(args.out / "ensemble_samples.csv")
+        summary.to_csv(args.out / "ensemble_summary.csv")
+        return 0
+
+    run_id = args.run_id or datetime.now().strftime("%Y%m%dT%H%M%S")
+    if args.chunk_size:
+        run_chunked(args, run_id)
+        return 0
+    if args.store:
+        run_stored(args, run_id)
+        return 0
+
+    on_step = None
+    if args.format == "parquet" and args.snapshot_every:
+        def on_step(step, residents):
+            if step % args.snapshot_every == 0 and step != args.steps:
+                write_table(args.out, "people", run_id, step, resident_frame(residents, step))
+
+    if args.resume:
+        result = resume_run(args.checkpoint_dir, args.checkpoint_every, kernel=args.kernel, on_step=on_step)
+    elif args.checkpoint_dir:
+        result = run_checkpointed(*params, args.checkpoint_dir, args.checkpoint_every, seed=args.seed,
+                                  kernel=args.kernel, on_step=on_step)
+    else:
+        result = run_economy(*params, seed=args.seed, on_step=on_step, kernel=args.kernel)
+    write_frame(args, run_id, "people", result.people_df)
+    write_frame(args, run_id, "businesses", result.business_df)
+    write_frame(args, run_id, "landlords", result.landlord_df)
+    write_json(args.out / "indicators.json", result.summary.as_dict())
+    inequality_summary(result.people_df, LORENZ_COLUMNS)[1].to_csv(args.out / "inequality.csv", index_label="column")
+    write_quantiles(args, {name: quantile_summary(get_column(result.people_df, name)) for name in quantile_sources()})
+    return 0
@@ -0,0 +1,575 @@
+"""Vectorized simulation engine for the dual-currency economy."""
+from dataclasses import asdict, dataclass
+from fractions import Fraction
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from .profiling import RunProfile, profiled
+
+# ---------------------------
+# Simulation Function
+# ---------------------------
+# Price structure of a typical basket
+BASKET_PRICE = 1000
+CAPTURE_RATIO = 0.3  # 30% of basket contributes to capital at vendor side
+MONTHS_PER_YEAR = 12
+
+# Residents are drawn in fixed-size blocks, each from its own stream, so that
+# resident i gets the same attributes no matter how a run is chunked or sharded
+RESIDENT_BLOCK_SIZE = 2 ** 14
+AGENT_CLASSES = ("residents", "businesses", "landlords")
+# Random streams: one per agent class, plus the resident -> business spending
+# graph and the resident -> landlord tenancies
+STREAM_NAMES = AGENT_CLASSES + ("spending_network", "tenancy")
+
+# Compact schema: counts and prices fit in int32, money amounts are float32.
+# Table totals are accumulated in float64 (see column_total), resident totals
+# exactly (see exact_total).
+INT_DTYPE = np.int32
+MONEY_DTYPE = np.float32
+
+
+def child_sequence(seed_seq, *key):
+    # Same derivation as SeedSequence.spawn, but addressed by key instead of
+    # by spawn order, so it can be recomputed independently in any process
+    return np.random.SeedSequence(
+        seed_seq.entropy, spawn_key=seed_seq.spawn_key + key, pool_size=seed_seq.pool_size
+    )
+
+
+def spawn_streams(seed=None):
+    # One independent SeedSequence per stream, all derived from one root
+    root = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    return {name: child_sequence(root, i) for i, name in enumerate(STREAM_NAMES)}
+
+
+def draw_resident_traits(seed_seq, start, stop):
+    # Draws whole blocks and keeps the [start, stop) slice of residents
+    if start == stop:
+        return [np.zeros(0, dtype=dtype) for dtype in (INT_DTYPE, INT_DTYPE, MONEY_DTYPE, MONEY_DTYPE, MONEY_DTYPE)]
+    first_block = start // RESIDENT_BLOCK_SIZE
+    last_block = -(-stop // RESIDENT_BLOCK_SIZE)
+    offset = first_block * RESIDENT_BLOCK_SIZE
+    blocks = []
+    for block in range(first_block, last_block):
+        rng = np.random.default_rng(child_sequence(seed_seq, block))
+        size = RESIDENT_BLOCK_SIZE
+        blocks.append((
+            rng.integers(20000, 50000, size=size, endpoint=True, dtype=INT_DTYPE),
+            rng.integers(800, 2000, size=size, endpoint=True, dtype=INT_DTYPE),
+            rng.uniform(0.0, 0.1, size=size).astype(MONEY_DTYPE),
+            rng.uniform(0.5, 0.85, size=size).astype(MONEY_DTYPE),
+            rng.uniform(0.4, 0.9, size=size).astype(MONEY_DTYPE),
+        ))
+    return [np.concatenate(column)[start - offset:stop - offset] for column in zip(*blocks)]
+
+
+def generate_residents(seed_seq, num_people, start=0):
+    # Residents are held as whole columns (struct of arrays). Only state that
+    # cannot be derived from income is stored; the step kernel recomputes the rest.
+    income, rent, capital_rate, spending_rate, universal_rate = draw_resident_traits(
+        seed_seq, start, start + num_people
+    )
+    capital = np.multiply(income, capital_rate, dtype=MONEY_DTYPE)
+    spending = np.divide(income, MONTHS_PER_YEAR, dtype=MONEY_DTYPE)
+    spending *= spending_rate
+    universal_demand = spending * universal_rate
+    universal_demand *= 0.2
+
+    return {
+        "income": income,
+        "rent": rent,
+        "spending": spending,
+        "universal_demand": universal_demand,
+        "wealth_before": capital.copy(),
+        # Evolving state
+        "capital": capital,
+        "universals": np.zeros(num_people, dtype=MONEY_DTYPE),
+        # Running totals over all steps
+        "universals_issued": np.zeros(num_people, dtype=MONEY_DTYPE),
+        "rent_paid": np.zeros(num_people, dtype=MONEY_DTYPE),
+        "dollar_spending": np.zeros(num_people, dtype=MONEY_DTYPE),
+        "universal_spending": np.zeros(num_people, dtype=MONEY_DTYPE),
+    }
+
+
+def step_residents(residents):
+    # Advance every resident by one month; all arrays are updated in place
+    income = residents["income"]
+    capital = residents["capital"]
+    universals = residents["universals"]
+
+    # Half of the gap to a target capital of 25% of income is issued over a year
+    issued = np.multiply(income, 0.25, dtype=MONEY_DTYPE)
+    issued -= capital
+    np.maximum(issued, 0, out=issued)
+    issued *= 0.5
+    # Create more universals for lowest incomes
+    income_boost = np.subtract(30000, income, dtype=MONEY_DTYPE)
+    np.maximum(income_boost, 0, out=income_boost)
+    income_boost *= 0.05
+    issued += income_boost
+    issued /= MONTHS_PER_YEAR
+    universals += issued
+    residents["universals_issued"] += issued
+
+    # Universals cover part of the basket as long as the balance allows it;
+    # the issued and income_boost buffers are reused as scratch space below
+    universal_spending = np.minimum(residents["universal_demand"], universals)
+    universals -= universal_spending
+
+    # Rent, then the dollar part of the basket, are paid out of the month's
+    # income and the capital. Whatever these funds cannot cover goes unpaid,
+    # so no money is created and capital never drops below zero.
+    np.add(capital, np.divide(income, MONTHS_PER_YEAR, out=income_boost, dtype=MONEY_DTYPE), out=capital)
+    rent_paid = np.minimum(residents["rent"], capital, out=income_boost, dtype=MONEY_DTYPE)
+    capital -= rent_paid
+    dollar_spending = np.subtract(residents["spending"], universal_spending, out=issued)
+    np.minimum(dollar_spending, capital, out=dollar_spending)
+    capital -= dollar_spending
+
+    residents["rent_paid"] += rent_paid
+    residents["dollar_spending"] += dollar_spending
+    residents["universal_spending"] += universal_spending
+
+
+STEP_KERNELS = ("auto", "numpy", "numba")
+
+
+def resolve_step_kernel(kernel="auto"):
+    # "auto" uses the compiled kernel (universal.kernels) when Numba is installed
+    # and this NumPy kernel otherwise; both give bit-identical results
+    if kernel not in STEP_KERNELS:
+        raise ValueError(f"unknown step kernel {kernel!r}, expected one of {STEP_KERNELS}")
+    if kernel == "numpy":
+        return step_residents
+    from .kernels import HAVE_NUMBA, step_residents_jit
+    if HAVE_NUMBA:
+        return step_residents_jit
+    if kernel == "numba":
+        raise ImportError("the 'numba' step kernel requires numba to be installed")
+    return step_residents
+
+
+# ---------------------------
+# Spending Network
+# ---------------------------
+# Every resident buys from SPENDING_EDGES businesses, splitting its spending
+# between them in fixed shares. The graph is drawn per resident block like the
+# traits, so it does not depend on how a run is chunked either.
+SPENDING_EDGES = 4
+# Residents routed per network (or tenancy) slice; bounds the memory of the
+# edges alive at once
+NETWORK_CHUNK_SIZE = 8 * RESIDENT_BLOCK_SIZE
+
+
+def network_slices(start, stop):
+    # Bounds of the routing slices of residents [start, stop), cut at multiples
+    # of NETWORK_CHUNK_SIZE. Inflows are float64 sums formed slice by slice, so
+    # they only match a serial run if chunks start on these boundaries too.
+    for lo in range(start - start % NETWORK_CHUNK_SIZE, stop, NETWORK_CHUNK_SIZE):
+        yield max(lo, start), min(lo + NETWORK_CHUNK_SIZE, stop)
+
+
+def spending_network(seed_seq, num_people, num_businesses, start=0):
+    # CSR matrix (residents x businesses) for residents [start, start + num_people).
+    # Each row holds exactly SPENDING_EDGES shares summing to 1, so the CSR
+    # arrays are written directly and no edge list has to be sorted.
+    if num_businesses == 0:
+        return sparse.csr_array((num_people, 0))
+    stop = start + num_people
+    first_block = start // RESIDENT_BLOCK_SIZE
+    offset = first_block * RESIDENT_BLOCK_SIZE
+    businesses, shares = [], []
+    for block in range(first_block, -(-stop // RESIDENT_BLOCK_SIZE)):
+        rng = np.random.default_rng(child_sequence(seed_seq, block))
+        size = (RESIDENT_BLOCK_SIZE, SPENDING_EDGES)
+        businesses.append(rng.integers(0, num_businesses, size=size, dtype=INT_DTYPE))
+        block_shares = rng.random(size)
+        block_shares /= block_shares.sum(axis=1, keepdims=True)
+        shares.append(block_shares)
+    rows = slice(start - offset, stop - offset)
+    indptr = np.arange(0, num_people * SPENDING_EDGES + 1, SPENDING_EDGES, dtype=np.int64)
+    return sparse.csr_array(
+        (np.concatenate(shares)[rows].ravel(), np.concatenate(businesses)[rows].ravel(), indptr),
+        shape=(num_people, num_businesses),
+    )
+
+
+def route_spending(network, people_df, inflows=None):
+    # Business inflows of both currencies as transposed mat-vec products, added
+    # into inflows (if given). Shares sum to 1 per resident, so the businesses
+    # receive exactly what the residents spent. The graph is fixed over a run, so
+    # routing the cumulative spending equals routing every step's flows.
+    inflows = {} if inflows is None else inflows
+    for name, column in [("universals", "Universal_Spending"), ("dollars", "Dollar_Spending")]:
+        routed = network.T @ people_df[column].to_numpy(dtype=np.float64)
+        inflows[name] = inflows[name] + routed if name in inflows else routed
+    return inflows
+
+
+def business_inflows(seed_seq, people_df, num_businesses, inflows=None):
+    # Routes the spending of the residents in people_df (a whole population or
+    # one chunk of it) slice by slice, so the full graph never exists at once
+    start = people_df.index.start
+    for lo, hi in network_slices(start, start + len(people_df)):
+        rows = people_df.iloc[lo - start:hi - start]
+        network = spending_network(seed_seq, len(rows), num_businesses, lo)
+        inflows = route_spending(network, rows, inflows)
+    if inflows is None:
+        inflows = {name: np.zeros(num_businesses) for name in ("universals", "dollars")}
+    return inflows
+
+
+# ---------------------------
+# Tenancy
+# ---------------------------
+def assign_landlords(seed_seq, num_people, num_landlords, start=0):
+    # Landlord index of residents [start, start + num_people), drawn per
+    # resident block like the traits
+    stop = start + num_people
+    first_block = start // RESIDENT_BLOCK_SIZE
+    offset = first_block * RESIDENT_BLOCK_SIZE
+    blocks = [
+        np.random.default_rng(child_sequence(seed_seq, block)).integers(
+            0, num_landlords, size=RESIDENT_BLOCK_SIZE, dtype=INT_DTYPE
+        )
+        for block in range(first_block, -(-stop // RESIDENT_BLOCK_SIZE))
+    ]
+    return np.concatenate(blocks)[start - offset:stop - offset]
+
+
+def landlord_inflows(seed_seq, people_df, num_landlords, inflows=None):
+    # Rent received and tenant count per landlord for the residents in people_df
+    # (a whole population or one chunk of it, in NETWORK_CHUNK_SIZE slices),
+    # added into inflows (if given). Tenancies are fixed over a run, so grouping
+    # the rent each resident paid over all steps (one bincount per slice)
+    # equals grouping every step's payments.
+    if inflows is None:
+        inflows = {"rent": np.zeros(num_landlords), "tenants": np.zeros(num_landlords, dtype=np.int64)}
+    if num_landlords == 0:
+        return inflows
+    start = people_df.index.start
+    for lo, hi in network_slices(start, start + len(people_df)):
+        rent = people_df["Rent_Paid"].to_numpy()[lo - start:hi - start]
+        landlords = assign_landlords(seed_seq, len(rent), num_landlords, lo)
+        inflows["rent"] += np.bincount(landlords, weights=rent, minlength=num_landlords)
+        inflows["tenants"] += np.bincount(landlords, minlength=num_landlords)
+    return inflows
+
+
+# ---------------------------
+# Agent Tables
+# ---------------------------
+# Columns that duplicate or follow from stored ones are not kept in the tables;
+# get_column and with_derived_columns compute them on demand.
+UNIVERSAL_PAYMENT = BASKET_PRICE * CAPTURE_RATIO * 0.5
+REAL_PAYMENT = BASKET_PRICE - UNIVERSAL_PAYMENT
+
+DERIVED_COLUMNS = {
+    "people": {
+        # Wealth before universals plus every universal issued, held or spent on
+        # the basket in place of dollars. Capital also moves with the run's
+        # income, rent and dollar spending, so it would not isolate universals.
+        "Wealth_After": lambda df: df["Wealth_Before"] + df["Universals"],
+        "Net_Gain": lambda df: df["Universals"],
+        "Real_Payment": lambda df: pd.Series(REAL_PAYMENT, index=df.index, dtype=MONEY_DTYPE),
+        "Universal_Payment": lambda df: pd.Series(UNIVERSAL_PAYMENT, index=df.index, dtype=MONEY_DTYPE),
+    },
+    "businesses": {
+        "Net_Gain": lambda df: df["Universals_Received"],
+    },
+    "landlords": {
+        "Net_Gain": lambda df: df["Total_Rent"] - df["Reinvestment"],
+    },
+}
+
+COLUMN_ORDER = {
+    "people": ["Income", "Rent", "Rent_Paid", "Capital", "Universals", "Dollar_Spending", "Universal_Spending",
+               "Wealth_Before", "Wealth_After", "Net_Gain", "Real_Payment", "Universal_Payment"],
+    "businesses": ["Annual_Revenue", "Universals_Received", "Dollars_Received", "Net_Gain"],
+    "landlords": ["Tenants", "Total_Rent", "Reinvestment", "Net_Gain"],
+}
+
+
+def agent_frame(table, columns, num_steps, start=0):
+    # start offsets the index, so chunks of a population keep their global agent ids
+    size = len(next(iter(columns.values())))
+    df = pd.DataFrame(columns, index=pd.RangeIndex(start, start + size), copy=False)
+    df.attrs.update(table=table, num_steps=num_steps)
+    return df
+
+
+def get_column(df, name):
+    # Stored column, or derived view computed from the stored ones
+    if name in df.columns:
+        return df[name]
+    return DERIVED_COLUMNS[df.attrs["table"]][name](df).rename(name)
+
+
+def with_derived_columns(df):
+    # Full table with every derived column materialized, in the original column order
+    order = COLUMN_ORDER[df.attrs["table"]]
+    full = pd.DataFrame({name: get_column(df, name) for name in order}, copy=False)
+    full.attrs.update(df.attrs)
+    return full
+
+
+def column_total(df, name):
+    return float(np.sum(get_column(df, name).to_numpy(), dtype=np.float64))
+
+
+def exact_total(values):
+    # Exact sum of an int or float32 array, as a Fraction. A float32 is m * 2**e
+    # with a 24-bit m, and float64 adds up 2**29 of them sharing e without
+    # rounding, so summing per exponent loses nothing. Exact partial sums add up
+    # to the same total however and in whatever order the residents are chunked.
+    if values.dtype.kind in "iu":
+        return Fraction(int(np.sum(values, dtype=np.int64)))
+    total = Fraction(0)
+    for lo in range(0, len(values), 2 ** 29):
+        mantissas, exponents = np.frexp(values[lo:lo + 2 ** 29])
+        low = int(exponents.min())
+        sums = np.bincount(exponents - low, weights=mantissas)
+        total += sum(Fraction(value) * Fraction(2) ** (low + e) for e, value in enumerate(sums) if value)
+    return total
+
+
+def resident_frame(residents, num_steps, start=0):
+    # Resident table for the current state; columns share memory with the state arrays
+    return agent_frame("people", {
+        "Income": residents["income"],
+        "Rent": residents["rent"],
+        "Rent_Paid": residents["rent_paid"],
+        "Capital": residents["capital"],
+        "Universals": residents["universals_issued"],
+        "Dollar_Spending": residents["dollar_spending"],
+        "Universal_Spending": residents["universal_spending"],
+        "Wealth_Before": residents["wealth_before"],
+    }, num_steps, start)
+
+
+def resident_totals(residents):
+    # Exact resident partial sums straight from the state arrays, one pass per
+    # stored array. Wealth_After and Net_Gain are linear in the stored columns, so
+    # their sums follow from these without materializing the derived columns.
+    totals = {
+        name: exact_total(residents[key])
+        for name, key in [
+            ("universals", "universals_issued"),
+            ("income", "income"),
+            ("capital_before", "wealth_before"),
+            ("dollar_spending", "dollar_spending"),
+            ("universal_spending", "universal_spending"),
+        ]
+    }
+    totals["capital_after"] = totals["capital_before"] + totals["universals"]
+    totals["net_gain"] = totals["universals"]
+    return totals
+
+
+def simulate_residents(num_people, num_steps, seed_seq, on_step=None, start=0, kernel="auto", resume=None,
+                       profile=None):
+    # Simulates residents [start, start + num_people) of the population and
+    # returns their table with its partial sums.
+    # on_step(step, residents) is called after every step, e.g. to snapshot the state;
+    # resume=(step, residents) continues from the state after that step instead
+    # of generating the residents (see universal.checkpoint).
+    # profile (a universal.profiling.RunProfile, if given) records every phase
+    step = resolve_step_kernel(kernel)
+    with profiled(profile, "resident_generation"):
+        if resume is None:
+            first_step, residents = 1, generate_residents(seed_seq, num_people, start)
+        else:
+            first_step, residents = resume[0] + 1, resume[1]
+    for step_number in range(first_step, num_steps + 1):
+        with profiled(profile, "resident_steps"):
+            step(residents)
+        if on_step is not None:
+            on_step(step_number, residents)
+    with profiled(profile, "resident_frame"):
+        people_df = resident_frame(residents, num_steps, start)
+    with profiled(profile, "aggregation"):
+        totals = resident_totals(residents)
+    return people_df, totals
+
+
+def simulate_businesses(num_businesses, num_steps, seed_seq, inflows, profile=None):
+    # inflows holds what the residents' spending routed to each business over
+    # the run (business_inflows)
+    with profiled(profile, "business_generation"):
+        rng = np.random.default_rng(seed_seq)
+        annual_revenue = rng.integers(100000, 300000, size=num_businesses, endpoint=True, dtype=INT_DTYPE)
+        business_df = agent_frame("businesses", {
+            "Annual_Revenue": annual_revenue,
+            # float64 like the routed sums, which exceed float32 precision
+            "Universals_Received": inflows["universals"].copy(),
+            "Dollars_Received": inflows["dollars"].copy(),
+        }, num_steps)
+    with profiled(profile, "aggregation"):
+        return business_df, class_totals(business_df)
+
+
+def simulate_landlords(num_landlords, num_steps, seed_seq, inflows, profile=None):
+    # inflows holds the rent received over the run and tenant count of each
+    # landlord (landlord_inflows)
+    with profiled(profile, "landlord_generation"):
+        rng = np.random.default_rng(seed_seq)
+        # Rent of a whole population adds up beyond float32 precision, so
+        # landlord money stays in the float64 of the grouped sums
+        total_rent = inflows["rent"].copy()
+        reinvestment = total_rent * rng.uniform(0.05, 0.3, size=num_landlords)
+        landlord_df = agent_frame("landlords", {
+            "Tenants": inflows["tenants"].astype(INT_DTYPE),
+            "Total_Rent": total_rent,
+            "Reinvestment": reinvestment,
+        }, num_steps)
+    with profiled(profile, "aggregation"):
+        return landlord_df, class_totals(landlord_df)
+
+
+@dataclass(frozen=True)
+class SimulationResult:
+    people_df: pd.DataFrame
+    business_df: pd.DataFrame
+    landlord_df: pd.DataFrame
+    summary: "EconomySummary"
+    profile: RunProfile = None
+
+
+def check_agent_counts(num_people, num_businesses, num_landlords):
+    # Residents pay their spending to businesses and their rent to landlords; a
+    # population with no one to pay would make that money vanish
+    if num_people > 0 and (num_businesses <= 0 or num_landlords <= 0):
+        raise ValueError("a population with residents needs at least one business and one landlord")
+
+
+def run_economy(num_people, num_businesses, num_landlords, num_steps, seed=None, on_step=None, kernel="auto",
+                resume=None, store=None, profile=None):
+    # Residents only depend on their own count, num_steps and their own stream,
+    # so they can also be simulated (and cached) independently; businesses and
+    # landlords additionally depend on the residents' spending and rent routed to them
+    # With store (a directory), residents are simulated out of core and people_df
+    # is a view over their memory-mapped state files (see universal.store).
+    # profile (a universal.profiling.RunProfile, if given) is filled in phase by
+    # phase and returned with the result
+    check_agent_counts(num_people, num_businesses, num_landlords)
+    streams = spawn_streams(seed)
+    if store is not None:
+        if on_step is not None or resume is not None:
+            raise ValueError("out-of-core runs step block by block and do not support on_step or resume")
+        from .store import simulate_residents_to_store
+        people_df, people_totals = simulate_residents_to_store(
+            num_people, num_steps, streams["residents"], store, kernel=kernel, profile=profile
+        )
+    else:
+        people_df, people_totals = simulate_residents(
+            num_people, num_steps, streams["residents"], on_step, kernel=kernel, resume=resume, profile=profile
+        )
+    with profiled(profile, "business_routing"):
+        inflows = business_inflows(streams["spending_network"], people_df, num_businesses)
+    business_df, business_totals = simulate_businesses(
+        num_businesses, num_steps, streams["businesses"], inflows, profile
+    )
+    with profiled(profile, "landlord_routing"):
+        rents = landlord_inflows(streams["tenancy"], people_df, num_landlords)
+    landlord_df, landlord_totals = simulate_landlords(num_landlords, num_steps, streams["landlords"], rents, profile)
+    with profiled(profile, "aggregation"):
+        summary = EconomySummary.from_totals(people_totals, business_totals, landlord_totals)
+    return SimulationResult(people_df, business_df, landlord_df, summary, profile)
+
+
+def simulate_dual_currency_economy(num_people, num_businesses, num_landlords, num_steps, seed=None,
+                                   on_step=None, kernel="auto"):
+    result = run_economy(num_people, num_businesses, num_landlords, num_steps, seed=seed, on_step=on_step,
+                         kernel=kernel)
+    summary = result.summary
+    return result.people_df, result.business_df, result.landlord_df, summary.total_universal_spending, summary.total_dollar_spending
+
+
+# ---------------------------
+# Indicators
+# ---------------------------
+# Per-class partial sums the Summary & Indicators metrics are built from
+TOTAL_COLUMNS = {
+    "people": {
+        "universals": "Universals",
+        "income": "Income",
+        "capital_before": "Wealth_Before",
+        "capital_after": "Wealth_After",
+        "net_gain": "Net_Gain",
+        "dollar_spending": "Dollar_Spending",
+        "universal_spending": "Universal_Spending",
+    },
+    "businesses": {
+        "universals": "Universals_Received",
+        "net_gain": "Net_Gain",
+    },
+    "landlords": {
+        "rent": "Total_Rent",
+        "net_gain": "Net_Gain",
+    },
+}
+
+
+def class_totals(df):
+    return {name: column_total(df, column) for name, column in TOTAL_COLUMNS[df.attrs["table"]].items()}
+
+
+def add_totals(totals, other):
+    # Accumulates the partial sums of another chunk of the same class into totals
+    for name, value in other.items():
+        totals[name] = totals.get(name, 0) + value
+    return totals
+
+
+@dataclass(frozen=True)
+class EconomySummary:
+    # Summary & Indicators metrics of a run (or of the residents streamed so far)
+    total_universals: float
+    total_universal_spending: float
+    total_dollar_spending: float
+    total_income: float
+    total_rent: float
+    total_capital_before: float
+    total_capital_after: float
+    purchasing_power_gain: float
+    total_net_gain: float
+
+    @classmethod
+    def from_totals(cls, people_totals, business_totals, landlord_totals):
+        # Ratios are not additive, so chunked and sharded runs merge the per-class
+        # partial sums (add_totals) and build the summary from those. Resident
+        # sums are exact (Fractions) until rounded to float here.
+        total_capital_before = people_totals["capital_before"]
+        total_capital_after = people_totals["capital_after"]
+        purchasing_power_gain = ((total_capital_after - total_capital_before) / total_capital_before * 100) if total_capital_before > 0 else 0
+
+        return cls(
+            # Universals received by businesses were issued to residents first
+            total_universals=float(people_totals["universals"]),
+            total_universal_spending=float(people_totals["universal_spending"]),
+            total_dollar_spending=float(people_totals["dollar_spending"]),
+            total_income=float(people_totals["income"]),
+            total_rent=float(landlord_totals["rent"]),
+            total_capital_before=float(total_capital_before),
+            total_capital_after=float(total_capital_after),
+            purchasing_power_gain=float(purchasing_power_gain),
+            # ... and so are counted once, in the residents' net gain: businesses
+            # only add what they gained beyond the universals they received
+            total_net_gain=float(people_totals["net_gain"])
+            + (business_totals["net_gain"] - business_totals["universals"])
+            + landlord_totals["net_gain"],
+        )
+
+    def as_dict(self):
+        return asdict(self)
+
+
+def macro_indicators(people_df, business_df, landlord_df):
+    # Summary & Indicators metrics recomputed from the tables, as a dict
+    return EconomySummary.from_totals(
+        class_totals(people_df), class_totals(business_df), class_totals(landlord_df)
+    ).as_dict()
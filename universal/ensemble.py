@@ -0,0 +1,58 @@
+"""Monte Carlo ensembles of independent, deterministically seeded replicas."""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+from .engine import child_sequence, run_economy
+from .kernels import set_kernel_threads
+
+# ---------------------------
+# Monte Carlo Ensemble
+# ---------------------------
+def replica_seeds(seed, num_replicas):
+    # Replica i always gets the same stream, whichever worker runs it
+    root = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    return [child_sequence(root, i) for i in range(num_replicas)]
+
+
+def run_replica(num_people, num_businesses, num_landlords, num_steps, seed, kernel="auto"):
+    # Only the indicators travel back to the parent process, not the tables
+    return run_economy(num_people, num_businesses, num_landlords, num_steps, seed=seed,
+                       kernel=kernel).summary.as_dict()
+
+
+def summarize_ensemble(samples, quantiles=(0.05, 0.5, 0.95), confidence=0.95):
+    # Mean, quantiles and a normal-approximation confidence interval of the mean per metric
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    mean = samples.mean()
+    std = samples.std(ddof=1)
+    sem = std / np.sqrt(len(samples))
+    summary = pd.DataFrame({"mean": mean, "std": std})
+    for q in quantiles:
+        summary[f"q{q * 100:g}"] = samples.quantile(q)
+    summary["ci_low"] = mean - z * sem
+    summary["ci_high"] = mean + z * sem
+    return summary
+
+
+def run_ensemble(num_people, num_businesses, num_landlords, num_steps, num_replicas, seed=None,
+                 max_workers=None, quantiles=(0.05, 0.5, 0.95), confidence=0.95, kernel="auto"):
+    # Replicas run in parallel across processes, each on a single-threaded kernel
+    seeds = replica_seeds(seed, num_replicas)
+    n = len(seeds)
+    max_workers = max_workers or os.cpu_count() or 1
+    # Batch several replicas per task so small runs are not dominated by IPC
+    chunksize = max(1, n // (4 * max_workers))
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=set_kernel_threads, initargs=(1,)) as pool:
+        results = list(pool.map(
+            run_replica,
+            [num_people] * n, [num_businesses] * n, [num_landlords] * n, [num_steps] * n, seeds, [kernel] * n,
+            chunksize=chunksize,
+        ))
+
+    samples = pd.DataFrame(results)
+    samples.index.name = "replica"
+    return samples, summarize_ensemble(samples, quantiles, confidence)
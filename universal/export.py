@@ -0,0 +1,53 @@
+"""Columnar Parquet export of the agent tables, partitioned by run id and step."""
+import numpy as np
+
+from .engine import with_derived_columns
+
+TABLE_NAMES = ("people", "businesses", "landlords")
+
+
+def compact_frame(df):
+    # int32 for integer columns (incomes, rents, revenues), float32 for money amounts,
+    # for frames built outside the engine.
+    dtypes = {}
+    for column, dtype in df.dtypes.items():
+        if np.issubdtype(dtype, np.integer):
+            dtypes[column] = np.int32
+        elif np.issubdtype(dtype, np.floating):
+            dtypes[column] = np.float32
+    return df.astype(dtypes, copy=False)
+
+
+def partition_path(root, table, run_id, step, part=0):
+    # Hive-style layout, so readers can prune on run_id and step without opening files
+    return root / table / f"run_id={run_id}" / f"step={step}" / f"part-{part}.parquet"
+
+
+def write_table(root, table, run_id, step, df, compression="zstd", part=0):
+    # Chunked runs write one part per chunk into the same partition
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    path = partition_path(root, table, run_id, step, part)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Derived columns are written out in full: constant or duplicated columns
+    # cost almost nothing once compressed, and readers need no engine code.
+    # Engine tables keep their own schema (landlord money is float64).
+    if "table" in df.attrs:
+        df = with_derived_columns(df)
+    else:
+        df = compact_frame(df)
+    pq.write_table(pa.Table.from_pandas(df, preserve_index=False), path, compression=compression)
+    return path
+
+
+def write_run(root, run_id, step, people_df, business_df, landlord_df, compression="zstd"):
+    frames = dict(zip(TABLE_NAMES, (people_df, business_df, landlord_df)))
+    return [write_table(root, table, run_id, step, df, compression) for table, df in frames.items()]
+
+
+def open_dataset(root, table):
+    # Lazily scanned dataset over every run and step written under root
+    import pyarrow.dataset as ds
+
+    return ds.dataset(root / table, format="parquet", partitioning="hive")
@@ -0,0 +1,72 @@
+"""Optional Numba-compiled resident step kernel.
+
+Applies every resident update rule in one fused loop per resident, with no
+temporary arrays, and runs the loop across all cores. It reproduces the
+NumPy kernel in engine.step_residents exactly: all arithmetic is float32,
+in the same order. Numba is an optional dependency; without it the engine
+uses the NumPy kernel.
+
+The kernel is only safe to call from the main thread unless Numba runs on a
+thread-safe layer other than TBB (e.g. NUMBA_THREADING_LAYER=omp): called from
+another thread under TBB, the process hangs at interpreter exit. Code running
+on worker threads, such as the Streamlit dashboard, passes kernel="numpy".
+"""
+import numpy as np
+
+from .engine import MONTHS_PER_YEAR
+
+try:
+    import numba
+except ImportError:  # pragma: no cover - depends on the environment
+    numba = None
+
+HAVE_NUMBA = numba is not None
+
+if HAVE_NUMBA:
+    @numba.njit(parallel=True, cache=True)
+    def _step_residents_loop(income, rent, spending, universal_demand, capital, universals,
+                             universals_issued, rent_paid, dollar_spending, universal_spending):
+        zero = np.float32(0.0)
+        months = np.float32(MONTHS_PER_YEAR)
+        for i in numba.prange(income.shape[0]):
+            income_i = np.float32(income[i])
+            capital_i = capital[i]
+
+            # Half of the capital gap, plus the low-income boost, issued over a year
+            issued = max(income_i * np.float32(0.25) - capital_i, zero) * np.float32(0.5)
+            issued += max(np.float32(30000.0) - income_i, zero) * np.float32(0.05)
+            issued /= months
+            balance = universals[i] + issued
+            universals_issued[i] += issued
+
+            # Universals cover part of the basket as long as the balance allows it
+            paid_in_universals = min(universal_demand[i], balance)
+            universals[i] = balance - paid_in_universals
+
+            # Rent, then the dollar part of the basket, only as far as funds allow
+            capital_i = capital_i + income_i / months
+            paid_rent = min(np.float32(rent[i]), capital_i)
+            capital_i = capital_i - paid_rent
+            paid_in_dollars = min(spending[i] - paid_in_universals, capital_i)
+            capital[i] = capital_i - paid_in_dollars
+
+            rent_paid[i] += paid_rent
+            dollar_spending[i] += paid_in_dollars
+            universal_spending[i] += paid_in_universals
+
+
+def set_kernel_threads(num_threads):
+    # Threads the compiled kernel runs on. Process pools (ensembles, sweeps)
+    # use this as their initializer with one thread per worker, so cores are
+    # not oversubscribed by a parallel kernel in every process.
+    if HAVE_NUMBA:
+        numba.set_num_threads(num_threads)
+
+
+def step_residents_jit(residents):
+    # Same contract as engine.step_residents: all arrays are updated in place
+    _step_residents_loop(
+        residents["income"], residents["rent"], residents["spending"], residents["universal_demand"],
+        residents["capital"], residents["universals"], residents["universals_issued"], residents["rent_paid"],
+        residents["dollar_spending"], residents["universal_spending"],
+    )
@@ -0,0 +1,50 @@
+"""Paginated views of large agent tables with precomputed sort orders and filters."""
+import numpy as np
+
+from .engine import COLUMN_ORDER, get_column, with_derived_columns
+
+# Constant columns are not worth a sort order
+UNSORTABLE_COLUMNS = {"Real_Payment", "Universal_Payment"}
+
+
+def sortable_columns(df):
+    return [name for name in COLUMN_ORDER[df.attrs["table"]] if name not in UNSORTABLE_COLUMNS]
+
+
+def sort_index(df, column):
+    # Ascending row order of one column; int32 positions halve the memory of int64
+    order = np.argsort(get_column(df, column).to_numpy(), kind="stable")
+    return order.astype(np.int32) if len(order) < 2 ** 31 else order
+
+
+def range_mask(df, ranges):
+    # ranges maps column -> (low, high), both inclusive; None for no filter
+    mask = None
+    for column, (low, high) in ranges.items():
+        values = get_column(df, column).to_numpy()
+        column_mask = (values >= low) & (values <= high)
+        mask = column_mask if mask is None else mask & column_mask
+    return mask
+
+
+def table_page(df, order, page, page_size, ascending=True, mask=None):
+    # Only the requested page is gathered and materialized; returns (page_df, matching_rows)
+    if not ascending:
+        order = order[::-1]
+    if mask is not None:
+        order = order[mask[order]]
+    start = page * page_size
+    rows = order[start:start + page_size]
+    page_df = df.iloc[rows]
+    page_df.attrs.update(df.attrs)
+    return with_derived_columns(page_df), len(order)
+
+
+def sample_rows(df, size, seed=0):
+    # Uniform sample of rows without replacement, kept in agent order
+    if len(df) <= size:
+        return df
+    rows = np.sort(np.random.default_rng(seed).choice(len(df), size=size, replace=False))
+    sample = df.iloc[rows]
+    sample.attrs.update(df.attrs)
+    return sample
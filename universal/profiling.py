@@ -0,0 +1,56 @@
+"""Per-phase timers and allocation counters for simulation runs."""
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+PROFILE_COLUMNS = ["phase", "calls", "wall_s", "alloc_peak_bytes", "alloc_net_bytes"]
+
+
+@dataclass
+class RunProfile:
+    # Filled in by run_economy / simulate_* when passed as profile=. Phases that
+    # run more than once (one per chunk or block) accumulate into one record.
+    # Allocation counters come from tracemalloc, which NumPy reports its array
+    # buffers to; tracing slows a run down, so it is opt-in.
+    track_allocations: bool = False
+    phases: dict = field(default_factory=dict)
+
+    @contextmanager
+    def phase(self, name):
+        tracing = self.track_allocations and not tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.start()
+        if self.track_allocations:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - start
+            record = self.phases.setdefault(name, dict.fromkeys(PROFILE_COLUMNS[1:], 0))
+            record["calls"] += 1
+            record["wall_s"] += wall
+            if self.track_allocations:
+                current, peak = tracemalloc.get_traced_memory()
+                record["alloc_peak_bytes"] = max(record["alloc_peak_bytes"], peak - before)
+                record["alloc_net_bytes"] += current - before
+            if tracing:
+                tracemalloc.stop()
+
+    @property
+    def total_s(self):
+        return sum(record["wall_s"] for record in self.phases.values())
+
+    def to_frame(self):
+        return pd.DataFrame(
+            [{"phase": name, **record} for name, record in self.phases.items()], columns=PROFILE_COLUMNS
+        )
+
+
+def profiled(profile, name):
+    # profile.phase(name), or a no-op when no profile was requested
+    return nullcontext() if profile is None else profile.phase(name)
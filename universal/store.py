@@ -0,0 +1,57 @@
+"""Out-of-core resident state: numpy.memmap files filled block by block."""
+from pathlib import Path
+
+import numpy as np
+from numpy.lib.format import open_memmap
+
+from .engine import (
+    RESIDENT_BLOCK_SIZE,
+    add_totals,
+    generate_residents,
+    resident_frame,
+    resident_totals,
+    resolve_step_kernel,
+)
+from .profiling import profiled
+
+# A whole number of RNG blocks; one block of state (about 40 bytes per
+# resident) plus the step kernel's scratch arrays stays within a typical L3 cache
+STORE_BLOCK_SIZE = 8 * RESIDENT_BLOCK_SIZE
+
+
+def open_resident_store(directory, mode="r"):
+    # State arrays of a store as memory maps, one .npy file per array
+    return {file.stem: np.load(file, mmap_mode=mode) for file in sorted(Path(directory).glob("*.npy"))}
+
+
+def simulate_residents_to_store(num_people, num_steps, seed_seq, directory, start=0, kernel="auto",
+                                block_size=STORE_BLOCK_SIZE, profile=None):
+    # Like simulate_residents, for populations larger than RAM. Residents are
+    # independent, so each block is generated, taken through every step while
+    # it is in cache, summed and written to its slice of the state files once:
+    # a run is one sequential pass over the disk and holds one block in memory.
+    # The returned table is a view over the files; pages are read on access.
+    # An empty population still creates (empty) state files.
+    step = resolve_step_kernel(kernel)
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    residents, totals = {}, {}
+    for lo in range(0, max(num_people, 1), block_size):
+        with profiled(profile, "resident_generation"):
+            block = generate_residents(seed_seq, min(block_size, num_people - lo), start + lo)
+        with profiled(profile, "resident_steps"):
+            for _ in range(num_steps):
+                step(block)
+        with profiled(profile, "aggregation"):
+            add_totals(totals, resident_totals(block))
+        with profiled(profile, "resident_store"):
+            for name, values in block.items():
+                if name not in residents:
+                    residents[name] = open_memmap(directory / f"{name}.npy", mode="w+", dtype=values.dtype,
+                                                  shape=(num_people,))
+                residents[name][lo:lo + len(values)] = values
+    with profiled(profile, "resident_store"):
+        for values in residents.values():
+            values.flush()
+    with profiled(profile, "resident_frame"):
+        return resident_frame(residents, num_steps, start), totals
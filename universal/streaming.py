@@ -0,0 +1,101 @@
+"""Chunked resident simulation with bounded memory and running indicator totals."""
+import copy
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from .aggregates import QUANTILE_COLUMNS, QUANTILE_SOURCES, QuantileSketch, quantile_sources
+from .engine import (
+    NETWORK_CHUNK_SIZE,
+    EconomySummary,
+    add_totals,
+    business_inflows,
+    check_agent_counts,
+    get_column,
+    landlord_inflows,
+    simulate_businesses,
+    simulate_landlords,
+    simulate_residents,
+    spawn_streams,
+)
+
+# A whole number of RNG blocks and routing slices (131,072 residents), so no
+# block is drawn twice and inflows are summed as in a serial run
+DEFAULT_CHUNK_SIZE = NETWORK_CHUNK_SIZE
+
+
+def iter_resident_chunks(num_people, num_steps, seed_seq, chunk_size=DEFAULT_CHUNK_SIZE, totals=None,
+                         kernel="auto"):
+    # Yields the resident table chunk by chunk; only one chunk is alive at a time
+    # if the consumer does not keep them. Chunks match the rows of a serial run
+    # exactly, and totals (if given) is updated with each chunk's partial sums.
+    # An empty population yields one empty chunk, so consumers always see a table.
+    for start in range(0, max(num_people, 1), chunk_size):
+        chunk, chunk_totals = simulate_residents(
+            min(chunk_size, num_people - start), num_steps, seed_seq, start=start, kernel=kernel
+        )
+        if totals is not None:
+            add_totals(totals, chunk_totals)
+        yield chunk
+
+
+def stream_dual_currency_economy(num_people, num_businesses, num_landlords, num_steps, seed=None,
+                                 chunk_size=DEFAULT_CHUNK_SIZE, kernel="auto", inflows=None, sketches=None):
+    # Yields (resident_chunk, summary), where summary is the EconomySummary over
+    # every resident simulated so far; after the last chunk it is bit-identical
+    # to the summary of the full run: resident partial sums are exact (see
+    # exact_total), and chunk_size must be a multiple of NETWORK_CHUNK_SIZE so
+    # inflows are summed over the same slices as in a serial run. Each chunk's spending and rent are routed to the
+    # businesses and landlords as it is simulated, and inflows (if given) is
+    # updated with the running inflows of both classes, so simulate_businesses /
+    # simulate_landlords can build their (small) tables after the stream.
+    # sketches (if given) is a list of (resident column, sketch) pairs, where
+    # each sketch (LorenzSketch, QuantileSketch) is updated with every chunk, for
+    # inequality measures and percentiles without the full columns in memory.
+    check_agent_counts(num_people, num_businesses, num_landlords)
+    if chunk_size <= 0 or chunk_size % NETWORK_CHUNK_SIZE:
+        raise ValueError(f"chunk_size must be a positive multiple of NETWORK_CHUNK_SIZE ({NETWORK_CHUNK_SIZE})")
+    streams = spawn_streams(seed)
+    inflows = {} if inflows is None else inflows
+    people_totals = {}
+    for chunk in iter_resident_chunks(num_people, num_steps, streams["residents"], chunk_size, people_totals, kernel):
+        inflows["businesses"] = business_inflows(
+            streams["spending_network"], chunk, num_businesses, inflows.get("businesses")
+        )
+        inflows["landlords"] = landlord_inflows(streams["tenancy"], chunk, num_landlords, inflows.get("landlords"))
+        for name, sketch in sketches or ():
+            sketch.update(get_column(chunk, name).to_numpy())
+        business_totals = simulate_businesses(num_businesses, num_steps, streams["businesses"], inflows["businesses"])[1]
+        landlord_totals = simulate_landlords(num_landlords, num_steps, streams["landlords"], inflows["landlords"])[1]
+        yield chunk, EconomySummary.from_totals(people_totals, business_totals, landlord_totals)
+
+
+def sketch_chunk(num_people, num_steps, seed_seq, start, columns, k, kernel="auto"):
+    # Only the sketches travel back to the parent process, not the chunk
+    chunk = simulate_residents(num_people, num_steps, seed_seq, start=start, kernel=kernel)[0]
+    return {name: QuantileSketch(k, seed=start).update(get_column(chunk, name).to_numpy()) for name in columns}
+
+
+def parallel_quantile_sketches(num_people, num_steps, seed=None, columns=QUANTILE_COLUMNS, k=200,
+                               chunk_size=DEFAULT_CHUNK_SIZE, max_workers=None, kernel="auto"):
+    # Percentile sketches of resident columns, with chunks simulated across
+    # worker processes and their sketches merged in chunk order. Chunks and
+    # their compaction coins are seeded by position, so the result does not
+    # depend on the number of workers.
+    seed_seq = spawn_streams(seed)["residents"]
+    starts = range(0, num_people, chunk_size)
+    sizes = [min(chunk_size, num_people - start) for start in starts]
+    sources = quantile_sources(columns)
+    sketches = {name: QuantileSketch(k) for name in sources}
+    max_workers = max_workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        parts = pool.map(sketch_chunk, sizes, [num_steps] * len(sizes), [seed_seq] * len(sizes), starts,
+                         [sources] * len(sizes), [k] * len(sizes), [kernel] * len(sizes))
+        for part in parts:
+            for name, sketch in part.items():
+                sketches[name].merge(sketch)
+    # A column read from another's sketch (Net_Gain from Universals) gets its
+    # own copy, so merging results column by column counts every value once
+    return {
+        name: sketches[name] if name in sketches else copy.deepcopy(sketches[QUANTILE_SOURCES[name]])
+        for name in columns
+    }
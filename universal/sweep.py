@@ -0,0 +1,84 @@
+"""Parameter sweeps over the sidebar parameters, run in parallel with cached points."""
+import hashlib
+import itertools
+import json
+import numbers
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from . import engine
+from .ensemble import run_replica
+from .kernels import set_kernel_threads
+
+PARAMETERS = ("num_people", "num_businesses", "num_landlords", "num_steps")
+
+# Indicators of points already computed in this process, keyed by (point, seed)
+_RESULT_CACHE = {}
+
+# On-disk results live under a directory named after a hash of the engine
+# source, so results computed by an older engine are never returned
+with open(engine.__file__, "rb") as _source:
+    ENGINE_HASH = hashlib.sha256(_source.read()).hexdigest()[:12]
+
+
+def parameter_grid(num_people, num_businesses, num_landlords, num_steps):
+    # Each argument is a single value or an iterable (list, range, ...) of values
+    axes = [[value] if isinstance(value, numbers.Integral) else list(value)
+            for value in (num_people, num_businesses, num_landlords, num_steps)]
+    return [dict(zip(PARAMETERS, point)) for point in itertools.product(*axes)]
+
+
+def point_key(point, seed):
+    return tuple(int(point[name]) for name in PARAMETERS) + (seed,)
+
+
+def cache_path(cache_dir, key):
+    return os.path.join(cache_dir, f"engine-{ENGINE_HASH}", "-".join(str(part) for part in key) + ".json")
+
+
+def cached_result(key, cache_dir):
+    if key in _RESULT_CACHE:
+        return _RESULT_CACHE[key]
+    if cache_dir is not None and os.path.exists(cache_path(cache_dir, key)):
+        with open(cache_path(cache_dir, key)) as f:
+            _RESULT_CACHE[key] = json.load(f)
+        return _RESULT_CACHE[key]
+    return None
+
+
+def store_result(key, indicators, cache_dir):
+    indicators = {name: float(value) for name, value in indicators.items()}
+    _RESULT_CACHE[key] = indicators
+    if cache_dir is not None:
+        path = cache_path(cache_dir, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(indicators, f)
+
+
+def run_sweep(grid, seed=0, max_workers=None, cache_dir=None, kernel="auto"):
+    # Every point uses the same seed (common random numbers), so resident i has
+    # the same traits at every grid point and differences come from the parameters.
+    # Results are only cached for an explicit integer seed, since seed=None is not reproducible.
+    keys = [point_key(point, seed) for point in grid]
+    results = {}
+    if seed is not None:
+        for key in keys:
+            indicators = cached_result(key, cache_dir)
+            if indicators is not None:
+                results[key] = indicators
+
+    missing = [key for key in dict.fromkeys(keys) if key not in results]
+    if missing:
+        max_workers = max_workers or os.cpu_count() or 1
+        # Points run in parallel across processes, each on a single-threaded kernel
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=set_kernel_threads, initargs=(1,)) as pool:
+            for key, indicators in zip(missing, pool.map(run_replica, *zip(*missing), [kernel] * len(missing))):
+                results[key] = indicators
+                if seed is not None:
+                    store_result(key, indicators, cache_dir)
+
+    rows = [dict(zip(PARAMETERS, key[:-1]), **results[key]) for key in keys]
+    return pd.DataFrame(rows)